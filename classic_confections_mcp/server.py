@@ -282,55 +282,61 @@ Return only valid JSON, no other text."""
 # LAYER 2: DETERMINISTIC MAPPING
 # ============================================================================
 
-@mcp.tool()
-def map_packaging_parameters(intent_json: str) -> dict:
-    """
-    Deterministically map intent to visual parameters using taxonomy.
-    
-    Takes analyzed intent and returns specific visual parameters:
-    - Era style details (typography, decoration, colors, composition)
-    - Package format specifications
-    - Material properties and textures
-    - Typography characteristics
-    - Brand tone cues
-    - Display context
-    
-    Args:
-        intent_json: JSON string from analyze_packaging_intent
-        
-    Returns:
-        Comprehensive parameter mapping for synthesis
-        
-    Example:
-        Input: {"era": "art_deco_1920s", "candy_type": "chocolate_bar", ...}
-        Output: Complete visual parameter specification with era styles,
-                materials, typography, etc.
-    """
-    try:
-        intent = json.loads(intent_json)
-    except json.JSONDecodeError:
-        return {"error": "Invalid JSON input"}
-    
-    # Get era style
-    era = intent.get("era", "mid_century_1950s")
-    era_style = ERA_STYLES.get(era, ERA_STYLES["mid_century_1950s"])
-    
-    # Determine package format based on candy type
-    candy_type = intent.get("candy_type", "chocolate_bar")
+def _resolve_package_format(candy_type: str) -> str:
+    """Pick the package format key for a candy type."""
     if "chocolate" in candy_type or "bar" in candy_type:
-        format_key = "bar_wrapper"
+        return "bar_wrapper"
     elif "hard" in candy_type or "mint" in candy_type or "lozenge" in candy_type:
-        format_key = "tin_container"
+        return "tin_container"
     elif "gum" in candy_type or "jelly" in candy_type:
-        format_key = "cellophane_bag"
+        return "cellophane_bag"
     elif "assort" in candy_type or "collection" in candy_type:
-        format_key = "box_and_sleeve"
+        return "box_and_sleeve"
     elif "taffy" in candy_type or "caramel" in candy_type:
-        format_key = "twist_wrap"
+        return "twist_wrap"
+    return "bar_wrapper"
+
+
+def _resolve_signature(intent: dict) -> tuple:
+    """
+    Normalize an intent to its (era, format, brand_tone, display) signature.
+    
+    Unknown era and brand tone keys fall back to the same defaults the
+    taxonomies use, so every intent resolves to valid taxonomy keys and
+    intents that differ only in per-item fields share a signature.
+    """
+    era = intent.get("era", "mid_century_1950s")
+    if era not in ERA_STYLES:
+        era = "mid_century_1950s"
+    
+    format_key = _resolve_package_format(intent.get("candy_type", "chocolate_bar"))
+    
+    brand_tone_key = intent.get("brand_tone", "wholesome_family")
+    if brand_tone_key not in BRAND_TONES:
+        brand_tone_key = "wholesome_family"
+    
+    if brand_tone_key == "premium_luxury":
+        display_key = "gift_presentation"
+    elif format_key == "tin_container":
+        display_key = "counter_display"
+    elif format_key == "counter_jar":
+        display_key = "candy_shop"
     else:
-        format_key = "bar_wrapper"
+        display_key = "shelf_facing"
     
+    return (era, format_key, brand_tone_key, display_key)
+
+
+def _build_signature_parameters(signature: tuple) -> dict:
+    """
+    Build the parameter skeleton shared by every intent with this signature.
+    
+    Per-item fields (user_color_hints, mood) are left for the caller to add.
+    """
+    era, format_key, brand_tone_key, display_key = signature
+    era_style = ERA_STYLES[era]
     package_format = PACKAGE_FORMATS[format_key]
+    brand_tone = BRAND_TONES[brand_tone_key]
     
     # Get material specs based on format and era
     primary_material = package_format["materials"][0]
@@ -340,22 +346,7 @@ def map_packaging_parameters(intent_json: str) -> dict:
     typo_style = era_style["typography"][0]
     typography = TYPOGRAPHY_STYLES.get(typo_style, TYPOGRAPHY_STYLES["bold_utilitarian"])
     
-    # Get brand tone
-    brand_tone_key = intent.get("brand_tone", "wholesome_family")
-    brand_tone = BRAND_TONES.get(brand_tone_key, BRAND_TONES["wholesome_family"])
-    
-    # Determine display context
-    if brand_tone_key == "premium_luxury":
-        display_context = DISPLAY_CONTEXTS["gift_presentation"]
-    elif format_key == "tin_container":
-        display_context = DISPLAY_CONTEXTS["counter_display"]
-    elif format_key == "counter_jar":
-        display_context = DISPLAY_CONTEXTS["candy_shop"]
-    else:
-        display_context = DISPLAY_CONTEXTS["shelf_facing"]
-    
-    # Build comprehensive parameter mapping
-    parameters = {
+    return {
         "era_style": {
             "period": era,
             "typography": era_style["typography"],
@@ -388,61 +379,51 @@ def map_packaging_parameters(intent_json: str) -> dict:
             "messaging": brand_tone["messaging"],
             "color_approach": brand_tone["color_approach"]
         },
-        "display_context": display_context,
-        "user_color_hints": intent.get("color_hints", []),
-        "mood": intent.get("mood", "nostalgic vintage charm")
+        "display_context": DISPLAY_CONTEXTS[display_key]
     }
-    
-    return parameters
-
-# ============================================================================
-# LAYER 3: CREATIVE SYNTHESIS (Claude call)
-# ============================================================================
 
 @mcp.tool()
-def synthesize_packaging_prompt(
-    base_prompt: str,
-    parameters_json: str
-) -> dict:
+def map_packaging_parameters(intent_json: str) -> dict:
     """
-    Final synthesis combining deterministic parameters with creative atmosphere.
+    Deterministically map intent to visual parameters using taxonomy.
     
-    Claude takes all mapped parameters and creates cohesive enhanced prompt with:
-    - Integrated era-specific atmosphere
-    - Material textures and lighting
-    - Typography and decoration details
-    - Brand personality expression
-    - Display context and viewing angle
-    - Sensory details (crinkle, shine, patina, wear)
-    - Nostalgic qualities
+    Takes analyzed intent and returns specific visual parameters:
+    - Era style details (typography, decoration, colors, composition)
+    - Package format specifications
+    - Material properties and textures
+    - Typography characteristics
+    - Brand tone cues
+    - Display context
     
     Args:
-        base_prompt: Original user prompt
-        parameters_json: JSON string from map_packaging_parameters
+        intent_json: JSON string from analyze_packaging_intent
         
     Returns:
-        Final enhanced prompt ready for image generation
+        Comprehensive parameter mapping for synthesis
         
-    Example output structure:
-        "A 1920s Art Deco chocolate bar wrapper with geometric sophistication.
-        Gold foil inner wrapper visible at crisp folded edges, outer sleeve in
-        rich black paper with embossed gold sunburst pattern radiating from
-        centered brand name in elegant streamlined serif..."
+    Example:
+        Input: {"era": "art_deco_1920s", "candy_type": "chocolate_bar", ...}
+        Output: Complete visual parameter specification with era styles,
+                materials, typography, etc.
     """
     try:
-        params = json.loads(parameters_json)
+        intent = json.loads(intent_json)
     except json.JSONDecodeError:
-        return {"error": "Invalid JSON parameters"}
+        return {"error": "Invalid JSON input"}
     
-    return {
-        "requires_claude": True,
-        "synthesis_guidance": f"""Create an enhanced image generation prompt for vintage candy packaging.
-
-Original request: {base_prompt}
+    parameters = _build_signature_parameters(_resolve_signature(intent))
+    parameters["user_color_hints"] = intent.get("color_hints", [])
+    parameters["mood"] = intent.get("mood", "nostalgic vintage charm")
+    
+    return parameters
 
-Use these deterministic parameters:
+# ============================================================================
+# LAYER 3: CREATIVE SYNTHESIS (Claude call)
+# ============================================================================
 
-ERA STYLE ({params['era_style']['period']}):
+def _build_synthesis_skeleton(params: dict) -> str:
+    """Render the parameter section of the synthesis guidance."""
+    return f"""ERA STYLE ({params['era_style']['period']}):
 - Atmosphere: {params['era_style']['atmosphere']}
 - Typography: {', '.join(params['era_style']['typography'])}
 - Decoration: {', '.join(params['era_style']['decoration'])}
@@ -469,11 +450,27 @@ BRAND PERSONALITY ({params['brand_tone']['personality']}):
 - Color approach: {params['brand_tone']['color_approach']}
 
 DISPLAY CONTEXT:
-{params['display_context']}
+{params['display_context']}"""
+
+
+def _compose_synthesis_guidance(
+    base_prompt: str,
+    skeleton: str,
+    mood: str,
+    color_hints: list
+) -> str:
+    """Wrap a parameter skeleton with the per-item prompt, mood and colors."""
+    return f"""Create an enhanced image generation prompt for vintage candy packaging.
+
+Original request: {base_prompt}
+
+Use these deterministic parameters:
+
+{skeleton}
 
 USER MOOD/PREFERENCES:
-- Mood: {params['mood']}
-- Color hints: {', '.join(params.get('user_color_hints', []))}
+- Mood: {mood}
+- Color hints: {', '.join(color_hints)}
 
 Synthesize a detailed image generation prompt that:
 1. Opens with the era and package type
@@ -486,6 +483,136 @@ Synthesize a detailed image generation prompt that:
 
 Write in prose (not bullet points). Be specific about visual details.
 Focus on what makes this era/format distinctive and authentic."""
+
+
+@mcp.tool()
+def synthesize_packaging_prompt(
+    base_prompt: str,
+    parameters_json: str
+) -> dict:
+    """
+    Final synthesis combining deterministic parameters with creative atmosphere.
+    
+    Claude takes all mapped parameters and creates cohesive enhanced prompt with:
+    - Integrated era-specific atmosphere
+    - Material textures and lighting
+    - Typography and decoration details
+    - Brand personality expression
+    - Display context and viewing angle
+    - Sensory details (crinkle, shine, patina, wear)
+    - Nostalgic qualities
+    
+    Args:
+        base_prompt: Original user prompt
+        parameters_json: JSON string from map_packaging_parameters
+        
+    Returns:
+        Final enhanced prompt ready for image generation
+        
+    Example output structure:
+        "A 1920s Art Deco chocolate bar wrapper with geometric sophistication.
+        Gold foil inner wrapper visible at crisp folded edges, outer sleeve in
+        rich black paper with embossed gold sunburst pattern radiating from
+        centered brand name in elegant streamlined serif..."
+    """
+    try:
+        params = json.loads(parameters_json)
+    except json.JSONDecodeError:
+        return {"error": "Invalid JSON parameters"}
+    
+    return {
+        "requires_claude": True,
+        "synthesis_guidance": _compose_synthesis_guidance(
+            base_prompt,
+            _build_synthesis_skeleton(params),
+            params['mood'],
+            params.get('user_color_hints', [])
+        )
+    }
+
+# ============================================================================
+# BATCH WORKFLOW
+# ============================================================================
+
+@mcp.tool()
+def batch_map_and_synthesize(batch_json: str) -> dict:
+    """
+    Map and synthesize a batch of intents, deduplicated by signature.
+    
+    Each intent is normalized to its (era, format, brand_tone, display)
+    signature. The shared parameters and synthesis skeleton are built once
+    per unique signature; only the per-item fields (base prompt, mood,
+    color hints) are filled in for each item. Items keep their input order.
+    
+    Args:
+        batch_json: JSON list of items, each {"base_prompt": str,
+                    "intent": intent JSON object from analyze_packaging_intent}
+        
+    Returns:
+        Shared parameters per signature group, per-item synthesis guidance
+        in input order, and dedup statistics
+        
+    Example:
+        Input: [{"base_prompt": "Art Deco mint tin",
+                 "intent": {"era": "art_deco_1920s", "candy_type": "mints", ...}},
+                ...]
+        Output: {"groups": [{"signature": {...}, "parameters": {...}}, ...],
+                 "items": [{"group": 0, "synthesis_guidance": "...", ...}, ...],
+                 "stats": {"total_items": 1000, "unique_signatures": 120,
+                           "dedup_ratio": 8.33}}
+    """
+    try:
+        batch = json.loads(batch_json)
+    except json.JSONDecodeError:
+        return {"error": "Invalid JSON batch"}
+    if not isinstance(batch, list):
+        return {"error": "Batch must be a JSON list"}
+    
+    group_index = {}
+    groups = []
+    skeletons = []
+    items = []
+    
+    for position, item in enumerate(batch):
+        if not isinstance(item, dict) or not isinstance(item.get("intent", {}), dict):
+            return {"error": f"Invalid batch item at index {position}"}
+        intent = item.get("intent", {})
+        
+        signature = _resolve_signature(intent)
+        group = group_index.get(signature)
+        if group is None:
+            # Heavy work runs once per unique signature
+            parameters = _build_signature_parameters(signature)
+            group = len(groups)
+            group_index[signature] = group
+            groups.append({
+                "signature": dict(zip(("era", "format", "brand_tone", "display"), signature)),
+                "parameters": parameters
+            })
+            skeletons.append(_build_synthesis_skeleton(parameters))
+        
+        base_prompt = item.get("base_prompt", "")
+        mood = intent.get("mood", "nostalgic vintage charm")
+        color_hints = intent.get("color_hints", [])
+        items.append({
+            "group": group,
+            "base_prompt": base_prompt,
+            "mood": mood,
+            "user_color_hints": color_hints,
+            "synthesis_guidance": _compose_synthesis_guidance(
+                base_prompt, skeletons[group], mood, color_hints
+            )
+        })
+    
+    return {
+        "requires_claude": True,
+        "groups": groups,
+        "items": items,
+        "stats": {
+            "total_items": len(items),
+            "unique_signatures": len(groups),
+            "dedup_ratio": round(len(items) / len(groups), 2) if groups else 0.0
+        }
     }
 
 # ============================================================================